@@ -2,26 +2,29 @@
 
 from __future__ import annotations
 
-import argparse
-import json
 import os
 import sys
 import time
-import urllib.error
-import urllib.request
-from dataclasses import dataclass
-from typing import Optional
+from typing import TYPE_CHECKING, NamedTuple, Optional
 
+# json, random, urllib.request and datetime are imported inside the functions
+# that use them: `start` needs none of them, and urllib.request alone pulls in
+# http.client and the email package.
+if TYPE_CHECKING:
+    import ssl
+    import urllib.request
 
-def _append_env_file(path: str, key: str, value: str) -> None:
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(f"{key}={value}\n")
 
-
-def _append_output_file(path: str, key: str, value: str) -> None:
+def _append_lines(path: str, pairs: list[tuple[str, str]]) -> None:
     # GitHub Actions outputs: https://docs.github.com/actions/using-workflows/workflow-commands-for-github-actions#setting-an-output-parameter
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(f"{key}={value}\n")
+    # A few short lines: skip the text I/O layer and append the encoded bytes directly.
+    data = "".join(f"{key}={value}\n" for key, value in pairs).encode("utf-8")
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+    try:
+        while data:
+            data = data[os.write(fd, data) :]
+    finally:
+        os.close(fd)
 
 
 def _env(name: str, default: str = "") -> str:
@@ -32,41 +35,99 @@ def _now_epoch_seconds() -> int:
     return int(time.time())
 
 
-@dataclass
-class HealthResult:
+class HealthResult(NamedTuple):
     status: str  # ok|fail|skipped
     http_status: str  # e.g. 200, 503, 000, skipped
     latency_ms: str  # numeric string, unknown, skipped
 
 
+# HealthResult is immutable, so the fixed results can be shared.
+_HEALTH_SKIPPED = HealthResult(status="skipped", http_status="skipped", latency_ms="skipped")
+_HEALTH_NO_RESPONSE = HealthResult(status="fail", http_status="000", latency_ms="0")
+
+
+# Backoff between health probes that got no response: start at the caller's
+# interval, double after each miss, and cap so a late-starting service is
+# still noticed reasonably quickly.
+_MAX_BACKOFF_SECONDS = 8.0
+_BACKOFF_JITTER_SECONDS = 0.25
+_MIN_ATTEMPT_TIMEOUT_SECONDS = 0.1
+
+
+# One TLS context (and one load of the system CA bundle) for every HTTPS
+# connection the process makes; created on the first HTTPS request.
+_SSL_CONTEXT: Optional[ssl.SSLContext] = None
+
+
+def _ssl_context() -> ssl.SSLContext:
+    global _SSL_CONTEXT
+    if _SSL_CONTEXT is None:
+        import ssl
+
+        context = ssl.create_default_context()
+        # Match http.client's own default context.
+        context.set_alpn_protocols(["http/1.1"])
+        _SSL_CONTEXT = context
+    return _SSL_CONTEXT
+
+
+# One opener for the whole process, built on first use. It keeps urllib's proxy
+# (http_proxy/https_proxy/no_proxy) and redirect handling.
+_OPENER: Optional[urllib.request.OpenerDirector] = None
+
+
+def _opener() -> urllib.request.OpenerDirector:
+    global _OPENER
+    if _OPENER is None:
+        import http.client
+        import urllib.request
+
+        class HTTPSHandler(urllib.request.HTTPSHandler):
+            # Plain-HTTP requests never pay for the SSL context.
+            def https_open(self, req):
+                return self.do_open(http.client.HTTPSConnection, req, context=_ssl_context())
+
+        _OPENER = urllib.request.build_opener(HTTPSHandler)
+    return _OPENER
+
+
+def _request_status(method: str, url: str, timeout_seconds: float) -> int:
+    import urllib.error
+    import urllib.request
+
+    req = urllib.request.Request(url, method=method)
+    try:
+        with _opener().open(req, timeout=timeout_seconds) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        e.close()
+        return e.code
+
+
 def _health_check(url: str, timeout_seconds: float = 10.0) -> HealthResult:
     if not url:
-        return HealthResult(status="skipped", http_status="skipped", latency_ms="skipped")
+        return _HEALTH_SKIPPED
 
     start = time.monotonic()
-    code: Optional[int] = None
+    code = 0
 
-    req = urllib.request.Request(url, method="GET")
     try:
-        with urllib.request.urlopen(req, timeout=timeout_seconds) as resp:
-            code = getattr(resp, "status", None)
-    except urllib.error.HTTPError as e:
-        code = e.code
+        # Only the status code matters, so ask for headers only.
+        code = _request_status("HEAD", url, timeout_seconds)
+        if code in (405, 501):
+            # Server does not support HEAD here; fall back to GET within what is left
+            # of this attempt's budget, and report the latency of the GET alone.
+            remaining = timeout_seconds - (time.monotonic() - start)
+            start = time.monotonic()
+            code = _request_status("GET", url, max(_MIN_ATTEMPT_TIMEOUT_SECONDS, remaining))
     except Exception:
         code = 0
 
     elapsed_ms = int((time.monotonic() - start) * 1000)
 
-    if code == 200:
-        status = "ok"
-    else:
-        status = "fail"
-
-    http_status = str(code).zfill(3) if code is not None else "000"
-    if http_status == "000":
-        status = "fail"
-
-    return HealthResult(status=status, http_status=http_status, latency_ms=str(elapsed_ms))
+    # Only HTTP 200 counts as healthy; no response at all is reported as 000.
+    status = "ok" if code == 200 else "fail"
+    return HealthResult(status=status, http_status=f"{code:03d}", latency_ms=str(elapsed_ms))
 
 
 def _health_check_wait_for_200(
@@ -81,16 +142,22 @@ def _health_check_wait_for_200(
         Semantics:
         - If url is empty => skipped
         - If wait_seconds <= 0 => single check
-        - Otherwise, retry once per interval (default 1s) until either:
+        - Otherwise, retry with exponential backoff starting at interval (default 1s,
+          doubling up to 8s, plus a little jitter) until either:
             - the target returns ANY HTTP response (status code available) -> return immediately
                 - status=ok only when HTTP 200
             - the retry window expires -> return the last result (typically http_status=000)
 
-        Note: wait_seconds is a retry window, not a per-request timeout.
+        Note: wait_seconds is a retry window, not a per-request timeout. Each attempt
+        uses timeout_seconds, shortened to whatever is left of the window.
     """
 
+    # Common case: no wait window. _health_check handles an empty url itself.
+    if isinstance(wait_seconds, (int, float)) and wait_seconds <= 0:
+        return _health_check(url, timeout_seconds=timeout_seconds)
+
     if not url:
-        return HealthResult(status="skipped", http_status="skipped", latency_ms="skipped")
+        return _HEALTH_SKIPPED
 
     try:
         wait_seconds = float(wait_seconds)
@@ -105,11 +172,13 @@ def _health_check_wait_for_200(
     if wait_seconds <= 0:
         return _health_check(url, timeout_seconds=timeout_seconds)
 
+    import random
+
     start = time.monotonic()
     deadline = start + max(0.0, wait_seconds)
-    interval = max(0.1, interval_seconds)
+    delay = max(0.1, interval_seconds)
 
-    last_result = HealthResult(status="fail", http_status="000", latency_ms="0")
+    last_result = _HEALTH_NO_RESPONSE
     next_attempt_at = start
 
     while True:
@@ -121,22 +190,38 @@ def _health_check_wait_for_200(
             time.sleep(min(next_attempt_at - now, deadline - now))
             continue
 
-        last_result = _health_check(url, timeout_seconds=timeout_seconds)
+        # The timeout applies per attempt, but never let one attempt run past the wait window
+        # (beyond a small floor so the attempt has a chance to connect at all).
+        attempt_timeout = max(_MIN_ATTEMPT_TIMEOUT_SECONDS, min(timeout_seconds, deadline - now))
+        last_result = _health_check(url, timeout_seconds=attempt_timeout)
 
         # If we got an HTTP status code (i.e., a response), return immediately.
         if last_result.http_status != "000":
-            if last_result.http_status == "200":
-                return HealthResult(status="ok", http_status="200", latency_ms=last_result.latency_ms)
             return last_result
 
-        next_attempt_at = next_attempt_at + interval
+        next_attempt_at = next_attempt_at + delay + random.uniform(0.0, _BACKOFF_JITTER_SECONDS)
+        delay = min(delay * 2, _MAX_BACKOFF_SECONDS)
+
+
+def _json_bytes(payload: dict) -> bytes:
+    # orjson is optional: use it when the runner happens to have it, otherwise stdlib json.
+    try:
+        import orjson
+    except ImportError:
+        import json
+
+        return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+    return orjson.dumps(payload)
 
 
 def _post_webhook(webhook_url: str, payload: dict) -> None:
     if not webhook_url:
         return
 
-    data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    import urllib.request
+
+    data = _json_bytes(payload)
     req = urllib.request.Request(
         webhook_url,
         data=data,
@@ -144,7 +229,7 @@ def _post_webhook(webhook_url: str, payload: dict) -> None:
         method="POST",
     )
     try:
-        with urllib.request.urlopen(req, timeout=10) as resp:
+        with _opener().open(req, timeout=10) as resp:
             # Consume response so connection closes cleanly
             resp.read()
     except Exception as e:
@@ -160,9 +245,14 @@ def cmd_start(project_name: str) -> int:
 
     start_s = _now_epoch_seconds()
     start_ms = int(time.time() * 1000)
-    _append_env_file(github_env, "BUILD_START_TIME", str(start_s))
-    _append_env_file(github_env, "BUILD_START_TIME_MS", str(start_ms))
-    _append_env_file(github_env, "PROJECT_NAME", project_name or "unknown")
+    _append_lines(
+        github_env,
+        [
+            ("BUILD_START_TIME", str(start_s)),
+            ("BUILD_START_TIME_MS", str(start_ms)),
+            ("PROJECT_NAME", project_name or "unknown"),
+        ],
+    )
     print(f"Build monitoring started for {project_name or 'unknown'}")
     return 0
 
@@ -174,13 +264,17 @@ def cmd_end(
     health_check_url: str,
     health_wait_seconds: float,
 ) -> int:
-    github_output = _env("GITHUB_OUTPUT")
+    env = os.environ.get
+
+    github_output = env("GITHUB_OUTPUT", "")
     if not github_output:
         print("Build Monitor: GITHUB_OUTPUT not set; are you running outside GitHub Actions?", file=sys.stderr)
         return 1
 
+    from datetime import datetime, timezone
+
     end_ms = int(time.time() * 1000)
-    start_ms_str = _env("BUILD_START_TIME_MS", "")
+    start_ms_str = env("BUILD_START_TIME_MS", "")
     if start_ms_str.strip():
         try:
             start_ms = int(start_ms_str)
@@ -188,7 +282,7 @@ def cmd_end(
             start_ms = end_ms
     else:
         # Back-compat: older start step stored seconds
-        start_s_str = _env("BUILD_START_TIME", "")
+        start_s_str = env("BUILD_START_TIME", "")
         try:
             start_s = int(start_s_str) if start_s_str else int(end_ms / 1000)
         except ValueError:
@@ -199,9 +293,9 @@ def cmd_end(
 
     status = (job_status or "unknown").strip() or "unknown"
 
-    effective_project = (_env("PROJECT_NAME") or project_name or "unknown").strip() or "unknown"
+    effective_project = (env("PROJECT_NAME", "") or project_name or "unknown").strip() or "unknown"
 
-    # Retry probes every 1 second up to health_wait_seconds. Each probe times out after 1 second.
+    # Retry probes with backoff (1s, 2s, 4s, 8s, ...) up to health_wait_seconds. Each probe times out after 1 second.
     per_try_timeout = 1.0
     health = _health_check_wait_for_200(
         health_check_url,
@@ -210,7 +304,7 @@ def cmd_end(
         interval_seconds=1.0,
     )
 
-    timestamp = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
 
     payload = {
         "project": effective_project,
@@ -220,28 +314,89 @@ def cmd_end(
         "health_http_status": health.http_status,
         "health_latency_ms": health.latency_ms,
         "timestamp": timestamp,
-        "repository": _env("GITHUB_REPOSITORY"),
-        "workflow": _env("GITHUB_WORKFLOW"),
-        "run_id": _env("GITHUB_RUN_ID"),
-        "run_number": _env("GITHUB_RUN_NUMBER"),
-        "job": _env("GITHUB_JOB"),
-        "sha": _env("GITHUB_SHA"),
+        "repository": env("GITHUB_REPOSITORY", ""),
+        "workflow": env("GITHUB_WORKFLOW", ""),
+        "run_id": env("GITHUB_RUN_ID", ""),
+        "run_number": env("GITHUB_RUN_NUMBER", ""),
+        "job": env("GITHUB_JOB", ""),
+        "sha": env("GITHUB_SHA", ""),
     }
 
     _post_webhook(webhook_url, payload)
 
     print(f"Build completed in {build_time_ms} milliseconds with status: {status}")
 
-    _append_output_file(github_output, "build_time_ms", str(build_time_ms))
-    _append_output_file(github_output, "build_status", status)
-    _append_output_file(github_output, "health_status", health.status)
-    _append_output_file(github_output, "health_http_status", health.http_status)
-    _append_output_file(github_output, "health_latency_ms", health.latency_ms)
+    _append_lines(
+        github_output,
+        [
+            ("build_time_ms", str(build_time_ms)),
+            ("build_status", status),
+            ("health_status", health.status),
+            ("health_http_status", health.http_status),
+            ("health_latency_ms", health.latency_ms),
+        ],
+    )
 
     return 0
 
 
-def main(argv: list[str]) -> int:
+# Flags accepted by each subcommand: flag -> (keyword argument, default).
+_COMMAND_FLAGS: dict[str, dict[str, tuple[str, object]]] = {
+    "start": {
+        "--project-name": ("project_name", "unknown"),
+    },
+    "end": {
+        "--project-name": ("project_name", "unknown"),
+        "--job-status": ("job_status", "unknown"),
+        "--webhook-url": ("webhook_url", ""),
+        "--health-check-url": ("health_check_url", ""),
+        "--health-wait-seconds": ("health_wait_seconds", 0.0),
+    },
+}
+
+
+def _parse_args_fast(argv: list[str]) -> Optional[tuple[str, dict]]:
+    """Parse the plain `<command> --flag value` form used by action.yml.
+
+    Returns None for anything else (help, abbreviations, unknown flags, bad values)
+    so the caller can fall back to argparse and its usual messages.
+    """
+
+    if not argv or argv[0] not in _COMMAND_FLAGS:
+        return None
+
+    flags = _COMMAND_FLAGS[argv[0]]
+    kwargs = {dest: default for dest, default in flags.values()}
+
+    args = argv[1:]
+    i = 0
+    while i < len(args):
+        name, sep, value = args[i].partition("=")
+        if not sep:
+            if i + 1 >= len(args):
+                return None
+            value = args[i + 1]
+            i += 1
+        i += 1
+
+        if name not in flags or value.startswith("-"):
+            return None
+
+        dest, default = flags[name]
+        if isinstance(default, float):
+            try:
+                kwargs[dest] = float(value)
+            except ValueError:
+                return None
+        else:
+            kwargs[dest] = value
+
+    return argv[0], kwargs
+
+
+def _parse_args(argv: list[str]) -> tuple[str, dict]:
+    import argparse
+
     parser = argparse.ArgumentParser(prog="build_monitor")
     sub = parser.add_subparsers(dest="command", required=True)
 
@@ -260,19 +415,20 @@ def main(argv: list[str]) -> int:
         help="Wait up to N seconds for health-check URL to return HTTP 200 (0 = no wait)",
     )
 
-    args = parser.parse_args(argv)
+    kwargs = vars(parser.parse_args(argv))
+    return kwargs.pop("command"), kwargs
+
+
+def main(argv: list[str]) -> int:
+    # argparse is only needed for unusual command lines; the action's own
+    # invocations are parsed directly to keep start-up cheap.
+    command, kwargs = _parse_args_fast(argv) or _parse_args(argv)
 
-    if args.command == "start":
-        return cmd_start(project_name=args.project_name)
+    if command == "start":
+        return cmd_start(**kwargs)
 
-    if args.command == "end":
-        return cmd_end(
-            project_name=args.project_name,
-            job_status=args.job_status,
-            webhook_url=args.webhook_url,
-            health_check_url=args.health_check_url,
-            health_wait_seconds=args.health_wait_seconds,
-        )
+    if command == "end":
+        return cmd_end(**kwargs)
 
     return 2
 
@@ -1,5 +1,8 @@
+import http.server
+import json
 import os
 import tempfile
+import threading
 import time
 import unittest
 from unittest import mock
@@ -67,6 +70,31 @@ class TestBuildMonitor(unittest.TestCase):
             except OSError:
                 pass
 
+    def test_end_reports_health_from_wait_window(self):
+        with tempfile.NamedTemporaryFile(mode="w+", delete=False) as out_file:
+            out_path = out_file.name
+        self.addCleanup(os.unlink, out_path)
+
+        with mock.patch.dict(os.environ, {"GITHUB_OUTPUT": out_path}), mock.patch(
+            "build_monitor._health_check_wait_for_200",
+            return_value=build_monitor.HealthResult(status="ok", http_status="200", latency_ms="7"),
+        ) as m:
+            rc = build_monitor.cmd_end(
+                project_name="proj",
+                job_status="success",
+                webhook_url="",
+                health_check_url="https://example.com/health",
+                health_wait_seconds=30.0,
+            )
+
+        self.assertEqual(rc, 0)
+        self.assertEqual(m.call_count, 1)
+        with open(out_path, "r", encoding="utf-8") as f:
+            kv = dict(line.split("=", 1) for line in f.read().splitlines() if "=" in line)
+        self.assertEqual(kv.get("health_status"), "ok")
+        self.assertEqual(kv.get("health_http_status"), "200")
+        self.assertEqual(kv.get("health_latency_ms"), "7")
+
     def test_health_wait_returns_immediately_on_response(self):
         with mock.patch(
             "build_monitor._health_check",
@@ -99,6 +127,230 @@ class TestBuildMonitor(unittest.TestCase):
             self.assertEqual(res.status, "ok")
             self.assertGreaterEqual(m.call_count, 2)
 
+    def test_health_wait_backs_off_between_retries(self):
+        clock = [100.0]
+        attempts = []
+
+        def fake_check(url, timeout_seconds=10.0):
+            attempts.append(clock[0] - 100.0)
+            if len(attempts) < 4:
+                return build_monitor.HealthResult(status="fail", http_status="000", latency_ms="0")
+            return build_monitor.HealthResult(status="ok", http_status="200", latency_ms="5")
+
+        def fake_sleep(seconds):
+            clock[0] += seconds
+
+        with mock.patch("build_monitor._health_check", side_effect=fake_check), mock.patch(
+            "build_monitor.time.monotonic", side_effect=lambda: clock[0]
+        ), mock.patch("build_monitor.time.sleep", side_effect=fake_sleep), mock.patch(
+            "random.uniform", return_value=0.0
+        ):
+            res = build_monitor._health_check_wait_for_200(
+                "https://example.com",
+                timeout_seconds=1.0,
+                wait_seconds=60.0,
+                interval_seconds=1.0,
+            )
+
+        self.assertEqual(res.status, "ok")
+        self.assertEqual(attempts, [0.0, 1.0, 3.0, 7.0])
+
+    def test_health_wait_clamps_attempt_timeout_to_window(self):
+        clock = [100.0]
+        timeouts = []
+
+        def hanging_check(url, timeout_seconds=10.0):
+            timeouts.append(timeout_seconds)
+            clock[0] += timeout_seconds
+            return build_monitor.HealthResult(status="fail", http_status="000", latency_ms="0")
+
+        with mock.patch("build_monitor._health_check", side_effect=hanging_check), mock.patch(
+            "build_monitor.time.monotonic", side_effect=lambda: clock[0]
+        ), mock.patch("build_monitor.time.sleep", side_effect=lambda s: None) as sleep:
+            res = build_monitor._health_check_wait_for_200(
+                "https://example.com",
+                timeout_seconds=3.0,
+                wait_seconds=5.0,
+                interval_seconds=1.0,
+            )
+
+        self.assertEqual(res.http_status, "000")
+        self.assertEqual(timeouts, [3.0, 2.0])
+        self.assertLessEqual(clock[0], 105.0)
+        sleep.assert_not_called()
+
+    def test_fast_arg_parsing_matches_argparse(self):
+        argvs = [
+            ["start", "--project-name", "proj"],
+            ["start"],
+            [
+                "end",
+                "--project-name",
+                "proj",
+                "--job-status",
+                "success",
+                "--webhook-url",
+                "",
+                "--health-check-url",
+                "https://example.com/health",
+                "--health-wait-seconds=5",
+            ],
+        ]
+        for argv in argvs:
+            with self.subTest(argv=argv):
+                self.assertEqual(build_monitor._parse_args_fast(argv), build_monitor._parse_args(argv))
+
+        self.assertIsNone(build_monitor._parse_args_fast(["end", "--health-wait-seconds", "soon"]))
+        self.assertIsNone(build_monitor._parse_args_fast(["end", "--project", "proj"]))
+        self.assertIsNone(build_monitor._parse_args_fast(["--help"]))
+
+    def _serve(self, handler_cls):
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler_cls)
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        # Reach the local server directly, whatever proxy the environment sets,
+        # and make the next request build a fresh opener from that environment.
+        env = {key: value for key, value in os.environ.items() if "proxy" not in key.lower()}
+        patchers = (
+            mock.patch.dict(os.environ, env, clear=True),
+            mock.patch.object(build_monitor, "_OPENER", None),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        return f"http://127.0.0.1:{server.server_port}"
+
+    def test_health_check_falls_back_to_get_when_head_not_allowed(self):
+        methods = []
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_HEAD(self):
+                methods.append("HEAD")
+                self.send_response(405)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                methods.append("GET")
+                self.send_response(200)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            def log_message(self, *args):
+                pass
+
+        res = build_monitor._health_check(self._serve(Handler) + "/health", timeout_seconds=2.0)
+        self.assertEqual(res.status, "ok")
+        self.assertEqual(methods, ["HEAD", "GET"])
+
+    def test_end_posts_webhook_payload(self):
+        received = []
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", "0"))
+                received.append(json.loads(self.rfile.read(length)))
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        webhook_url = self._serve(Handler) + "/hook"
+
+        with tempfile.NamedTemporaryFile(mode="w+", delete=False) as out_file:
+            out_path = out_file.name
+        self.addCleanup(os.unlink, out_path)
+
+        with mock.patch.dict(
+            os.environ,
+            {"GITHUB_OUTPUT": out_path, "BUILD_START_TIME_MS": str(int(time.time() * 1000)), "PROJECT_NAME": "proj"},
+        ):
+            rc = build_monitor.cmd_end(
+                project_name="proj",
+                job_status="success",
+                webhook_url=webhook_url,
+                health_check_url="",
+                health_wait_seconds=0.0,
+            )
+
+        self.assertEqual(rc, 0)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]["project"], "proj")
+        self.assertEqual(received[0]["status"], "success")
+        self.assertEqual(received[0]["health_status"], "skipped")
+
+    def test_health_check_goes_through_http_proxy(self):
+        requested = []
+
+        class Proxy(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_HEAD(self):
+                requested.append(self.path)
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        proxy_url = self._serve(Proxy)
+
+        with mock.patch.dict(os.environ, {"http_proxy": proxy_url}):
+            res = build_monitor._health_check("http://service.invalid/health", timeout_seconds=2.0)
+
+        self.assertEqual(res.status, "ok")
+        self.assertEqual(requested, ["http://service.invalid/health"])
+
+    def test_plain_http_health_check_does_not_build_ssl_context(self):
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        url = self._serve(Handler) + "/health"
+        with mock.patch("build_monitor._ssl_context") as ssl_context:
+            res = build_monitor._health_check(url, timeout_seconds=2.0)
+
+        self.assertEqual(res.status, "ok")
+        ssl_context.assert_not_called()
+
+    def test_get_fallback_shares_attempt_budget_and_reports_own_latency(self):
+        clock = [100.0]
+        calls = []
+
+        def fake_request(method, url, timeout_seconds):
+            calls.append((method, timeout_seconds))
+            if method == "HEAD":
+                clock[0] += 3.0
+                return 405
+            clock[0] += 1.0
+            return 200
+
+        with mock.patch("build_monitor._request_status", side_effect=fake_request), mock.patch(
+            "build_monitor.time.monotonic", side_effect=lambda: clock[0]
+        ):
+            res = build_monitor._health_check("https://example.com/health", timeout_seconds=5.0)
+
+        self.assertEqual(res.status, "ok")
+        self.assertEqual(calls, [("HEAD", 5.0), ("GET", 2.0)])
+        self.assertEqual(res.latency_ms, "1000")
+
 
 if __name__ == "__main__":
     unittest.main()